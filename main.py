@@ -1,18 +1,17 @@
 # --- IMPORTS ---
+# Heavy libraries (geopandas/GDAL, plotly, rapidfuzz) are imported inside the
+# functions that need them so the first paint does not pay for all of them.
 import streamlit as st
-import plotly.graph_objects as go
-import geopandas as gpd
 import os
 import pandas as pd
-from shapely.geometry import MultiPolygon
-from plotly.colors import sample_colorscale
-from numpy import interp
-import random
-try:
-    from fuzzywuzzy import process
-    FUZZYWUZZY_AVAILABLE = True
-except ImportError:
-    FUZZYWUZZY_AVAILABLE = False
+
+def _load_rapidfuzz():
+    """Import rapidfuzz only when an uploaded layer actually needs matching."""
+    try:
+        from rapidfuzz import fuzz, process
+        return fuzz, process
+    except ImportError:
+        return None, None
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -22,14 +21,14 @@ st.set_page_config(
 )
 
 # --- SESSION STATE INITIALIZATION ---
-if 'map_view' not in st.session_state:
-    st.session_state.map_view = {}
 if 'uploaded_files' not in st.session_state:
     st.session_state.uploaded_files = {}
 if 'province_colors' not in st.session_state:
     st.session_state.province_colors = {}
 if 'province_visibility' not in st.session_state:
     st.session_state.province_visibility = {}
+if 'layer_indices' not in st.session_state:
+    st.session_state.layer_indices = {}
 
 
 # --- SIDEBAR STYLING ---
@@ -54,6 +53,68 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# --- GEO DATA LOADING ---
+def _polygon_coords(gdf):
+    """Extract (lons, lats) lists for every exterior ring, grouped per row.
+
+    explode() flattens MultiPolygons up front, so none of the drawing code
+    needs to branch on geometry type. Rings are kept as NumPy arrays:
+    Plotly serializes those directly, without the two list copies that
+    coords.xy plus list() used to make per polygon.
+    """
+    import numpy as np
+
+    coords = [[] for _ in range(len(gdf))]
+    for idx, poly in gdf.geometry.reset_index(drop=True).explode(index_parts=False).items():
+        ring = np.asarray(poly.exterior.coords)
+        coords[idx].append((ring[:, 0], ring[:, 1]))
+    return coords
+
+# ~0.001 degrees (~100 m) is invisible at the zoom levels the app uses but
+# cuts the vertex count (and the Plotly payload) by an order of magnitude.
+SIMPLIFY_TOLERANCE = 0.001
+
+def _read_geo_file(name):
+    """Load a geo_data layer, converting the GeoJSON to GeoParquet on first use.
+
+    Parquet (Arrow + WKB) loads much faster than re-parsing GeoJSON text on
+    every cold start. Falls back to the GeoJSON if pyarrow is unavailable.
+    """
+    import geopandas as gpd
+
+    geojson_path = os.path.join("geo_data", f"{name}.geojson")
+    parquet_path = os.path.join("geo_data", f"{name}.parquet")
+    try:
+        if not os.path.exists(parquet_path):
+            gpd.read_file(geojson_path).to_parquet(parquet_path)
+        return gpd.read_parquet(parquet_path)
+    except ImportError:
+        return gpd.read_file(geojson_path)
+
+@st.cache_resource
+def load_geo():
+    """Read the static GeoJSON files once per process instead of on every rerun."""
+    districts_gdf = _read_geo_file("districts")
+    provinces_gdf = _read_geo_file("provinces")
+    nepal_border_gdf = provinces_gdf.dissolve()
+    # Simplify after dissolving so the national outline keeps no slivers.
+    districts_gdf['geometry'] = districts_gdf.geometry.simplify(SIMPLIFY_TOLERANCE, preserve_topology=True)
+    provinces_gdf['geometry'] = provinces_gdf.geometry.simplify(SIMPLIFY_TOLERANCE, preserve_topology=True)
+    nepal_border_gdf['geometry'] = nepal_border_gdf.geometry.simplify(SIMPLIFY_TOLERANCE, preserve_topology=True)
+    # District centroids for icon layers, computed once in vectorized GEOS.
+    district_centroids = districts_gdf.geometry.centroid
+    districts_gdf['cx'] = district_centroids.x
+    districts_gdf['cy'] = district_centroids.y
+    lons, lats = nepal_border_gdf.geometry.union_all().exterior.coords.xy
+    map_extent = ([min(lons), max(lons)], [min(lats), max(lats)])
+    coords_cache = {
+        'districts': _polygon_coords(districts_gdf),
+        'provinces': _polygon_coords(provinces_gdf),
+        'nepal_border': _polygon_coords(nepal_border_gdf),
+    }
+    return districts_gdf, provinces_gdf, nepal_border_gdf, map_extent, coords_cache
+
+
 st.sidebar.title("Map Controls ⚙️")
 
 # --- DATA UPLOAD ---
@@ -75,9 +136,31 @@ if uploaded_file is not None:
             df = pd.read_csv(uploaded_file)
             value_column = next((col for col in df.columns if col.lower() != 'location'), None)
             if value_column:
+                # Classify (and cast) the value column once at upload instead
+                # of re-coercing it on every rerun.
+                numeric_values = pd.to_numeric(df[value_column], errors='coerce')
+                is_numeric = bool(numeric_values.notna().all())
+                if is_numeric:
+                    df[value_column] = numeric_values
+                # Fuzzy-match the locations once, here, so reruns never rematch.
+                fuzz, rf_process = _load_rapidfuzz()
+                if rf_process is not None and 'Location' in df.columns:
+                    import numpy as np
+                    districts_gdf = load_geo()[0]
+                    district_col_name = 'DIST_EN' if 'DIST_EN' in districts_gdf.columns else 'DISTRICT'
+                    official_districts = districts_gdf[district_col_name].tolist()
+                    locations = df['Location'].tolist()
+                    scores = rf_process.cdist(locations, official_districts, scorer=fuzz.WRatio, score_cutoff=80, workers=-1)
+                    best_idx = scores.argmax(axis=1)
+                    best_ok = scores[np.arange(len(locations)), best_idx] >= 80
+                    df['matched_location'] = [official_districts[i] if ok else None for i, ok in zip(best_idx, best_ok)]
+                    corrections = sum(1 for loc, match in zip(locations, df['matched_location']) if match is not None and match != loc)
+                    if corrections:
+                        st.toast(f"Matched {corrections} location(s) in '{file_key}' to official district names", icon='✅')
                 st.session_state.uploaded_files[file_key] = {
                     "data": df,
                     "value_column": value_column,
+                    "is_numeric": is_numeric,
                     "visible": True,
                     "color": '#FF4500', 
                     "tooltip_visible": True,
@@ -101,8 +184,8 @@ with st.sidebar.expander("Custom Data Layers", expanded=True):
                 file_info['display_name'] = st.text_input("Layer Name", value=file_info['display_name'], key=f"dname_{file_name}")
                 file_info['tooltip_label'] = st.text_input("Tooltip Label", value=file_info['tooltip_label'], key=f"tlabel_{file_name}")
                 
-                is_numeric = pd.to_numeric(file_info['data'][file_info['value_column']], errors='coerce').notna().all()
-                
+                is_numeric = file_info['is_numeric']
+
                 col1, col2 = st.columns([5, 2], gap="small")
                 with col1:
                     file_info['visible'] = st.checkbox(f"Show Layer", value=file_info['visible'], key=f"vis_{file_name}")
@@ -127,7 +210,7 @@ with st.sidebar.expander("Base Layer Controls", expanded=True):
     color_by_province = st.checkbox("Color by Province")
     if color_by_province:
         with st.expander("Province Colors & Visibility", expanded=False):
-            provinces_gdf_for_colors = gpd.read_file(os.path.join("geo_data", "provinces.geojson"))
+            _, provinces_gdf_for_colors, _, _, _ = load_geo()
             default_prov_colors = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692']
             
             for idx, row in provinces_gdf_for_colors.iterrows():
@@ -161,146 +244,199 @@ with st.sidebar.expander("Tooltip Controls", expanded=True):
         for file_name, file_info in st.session_state.uploaded_files.items():
             file_info['tooltip_visible'] = st.checkbox(f"Show '{file_info['display_name']}' values", value=file_info.get('tooltip_visible', True), key=f"tooltip_{file_name}")
 
-# *main function
-def main():
-    st.title("Map of Nepal 🇳🇵")
-    
-    try:
-        districts_filepath = os.path.join("geo_data", "districts.geojson")
-        provinces_filepath = os.path.join("geo_data", "provinces.geojson")
-        
-        districts_gdf = gpd.read_file(districts_filepath)
-        provinces_gdf = gpd.read_file(provinces_filepath)
-        
-        district_col_name = 'DIST_EN' if 'DIST_EN' in districts_gdf.columns else 'DISTRICT'
-        
-        nepal_border_gdf = provinces_gdf.dissolve()
-        fig = go.Figure()
-        
-        if color_by_province:
-            for i, row in provinces_gdf.iterrows():
-                if st.session_state.province_visibility.get(i, True):
-                    color = st.session_state.province_colors.get(i, '#CCCCCC')
-                    if isinstance(row.geometry, MultiPolygon):
-                        for poly in row.geometry.geoms:
-                            lons, lats = poly.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), fill="toself", fillcolor=color, line_color=color, mode='lines', hoverinfo='none'))
-                    else:
-                        lons, lats = row.geometry.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), fill="toself", fillcolor=color, line_color=color, mode='lines', hoverinfo='none'))
+# *figure builder
+@st.cache_data(show_spinner=False)
+def build_figure(_geo, _layers, map_settings, layer_specs):
+    """Assemble the Plotly figure for the current settings.
 
-        # *Draw custom data layers
-        for file_name, file_info in st.session_state.uploaded_files.items():
-            if file_info['visible']:
-                user_df = file_info['data'].copy()
-                value_col = file_info.get('value_column')
-                
-                if 'Location' in user_df.columns and value_col:
-                    
-                    if FUZZYWUZZY_AVAILABLE:
-                        official_districts = districts_gdf[district_col_name].tolist()
-                        def get_match(loc):
-                            match, score = process.extractOne(loc, official_districts)
-                            if score >= 80:
-                                if loc != match:
-                                    st.toast(f"Matched '{loc}' to '{match}'", icon='✅')
-                                return match
-                            return None
-                        user_df['matched_location'] = user_df['Location'].apply(get_match)
-                        merge_on_col = 'matched_location'
+    Cached so reruns that only touch unrelated widgets (e.g. renaming a
+    layer) reuse the previous figure. The underscore arguments are excluded
+    from the cache key; `map_settings` and `layer_specs` carry the
+    primitives (and data hashes) that actually change the drawing.
+    Returns the figure plus the names of layers with no matching locations.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+    from plotly.colors import sample_colorscale
+
+    districts_gdf, provinces_gdf, nepal_border_gdf, map_extent, coords_cache = _geo
+    district_coords = coords_cache['districts']
+    province_coords = coords_cache['provinces']
+    district_col_name = 'DIST_EN' if 'DIST_EN' in districts_gdf.columns else 'DISTRICT'
+    (show_district_borders, show_province_borders, color_by_province,
+     province_colors, province_visibility, show_district_tooltip) = map_settings
+    province_colors = dict(province_colors)
+    province_visibility = dict(province_visibility)
+
+    gap = np.array([np.nan])
+
+    def concat_polygons(polygons):
+        # Join rings into one x/y array pair with NaN gaps between polygons.
+        xs, ys = [], []
+        for lons, lats in polygons:
+            xs.append(lons); xs.append(gap)
+            ys.append(lats); ys.append(gap)
+        return np.concatenate(xs), np.concatenate(ys)
+
+    fig = go.Figure()
+    empty_layers = []
+
+    if color_by_province:
+        polys_by_color = {}
+        for i in range(len(provinces_gdf)):
+            if province_visibility.get(i, True):
+                color = province_colors.get(i, '#CCCCCC')
+                polys_by_color.setdefault(color, []).extend(province_coords[i])
+        for color, polygons in polys_by_color.items():
+            xs, ys = concat_polygons(polygons)
+            fig.add_trace(go.Scatter(x=xs, y=ys, fill="toself", fillcolor=color, line_color=color, mode='lines', hoverinfo='none'))
+
+    # *Draw custom data layers
+    for file_name, file_info in _layers.items():
+        if file_info['visible']:
+            user_df = file_info['data'].copy()
+            value_col = file_info.get('value_column')
+
+            if 'Location' in user_df.columns and value_col:
+
+                merge_on_col = 'matched_location' if 'matched_location' in user_df.columns else 'Location'
+
+                # Select matching districts directly instead of a pd.merge:
+                # keeps districts_gdf's index (for the coords cache) and
+                # avoids copying the geometry columns per rerun.
+                mapped = user_df.dropna(subset=[merge_on_col]).drop_duplicates(merge_on_col).set_index(merge_on_col)
+                hits = districts_gdf[district_col_name].isin(mapped.index)
+                user_data_gdf = districts_gdf[hits].copy()
+                user_data_gdf[value_col] = mapped.loc[user_data_gdf[district_col_name], value_col].values
+
+                if user_data_gdf.empty:
+                    empty_layers.append(file_name)
+                    continue
+
+                if file_info['is_numeric']:
+                    # *Numeric data (heatmap)
+                    vals = user_data_gdf[value_col].to_numpy(float)
+                    if vals.min() == vals.max():
+                        norm = np.full(len(vals), 0.5)
                     else:
-                        merge_on_col = 'Location'
-                    
-                    user_data_gdf = pd.merge(districts_gdf, user_df, left_on=district_col_name, right_on=merge_on_col, how='inner')
+                        norm = (vals - vals.min()) / (vals.max() - vals.min())
+                    colorscale = [[0, 'rgba(255,255,255,0)'], [1, file_info['color']]]
+                    # Quantize the shades to a small palette so districts with
+                    # the same bucket share one NaN-separated trace, instead of
+                    # one trace per district.
+                    n_buckets = 16
+                    bucket = np.clip((norm * n_buckets).astype(int), 0, n_buckets - 1)
+                    palette = sample_colorscale(colorscale, np.linspace(0, 1, n_buckets).tolist())
+                    for b in np.unique(bucket):
+                        xs, ys = concat_polygons([p for district_idx in user_data_gdf.index[bucket == b] for p in district_coords[district_idx]])
+                        fig.add_trace(go.Scatter(x=xs, y=ys, fill="toself", fillcolor=palette[b], line_color='rgba(0,0,0,0)', mode='lines', hoverinfo='none'))
+                else:
+                    # *String data (icons) - one Scattergl trace for all districts
+                    n = len(user_data_gdf)
+                    jitter_x = np.random.uniform(-0.005, 0.005, size=n)
+                    jitter_y = np.random.uniform(-0.005, 0.005, size=n)
+                    fig.add_trace(go.Scattergl(
+                        x=user_data_gdf['cx'].to_numpy() + jitter_x,
+                        y=user_data_gdf['cy'].to_numpy() + jitter_y,
+                        mode='text',
+                        text=[file_info.get('icon', '📍')] * n,
+                        textfont=dict(size=16, color=file_info['color']),
+                        hoverinfo='none'
+                    ))
 
-                    if user_data_gdf.empty:
-                        st.warning(f"For '{file_info['display_name']}', no matching locations were found.")
-                        continue
+    def add_border_trace(coords, fig, line_color, line_width):
+        # One Scattergl with NaN gaps instead of one trace per polygon.
+        all_x, all_y = concat_polygons([p for polygons in coords for p in polygons])
+        fig.add_trace(go.Scattergl(x=all_x, y=all_y, mode='lines', line_color=line_color, line_width=line_width, hoverinfo='none'))
 
-                    is_numeric = pd.to_numeric(user_data_gdf[value_col], errors='coerce').notna().all()
-                    
-                    if is_numeric:
-                        # *Numeric data (heatmap)
-                        user_data_gdf[value_col] = pd.to_numeric(user_data_gdf[value_col])
-                        min_val, max_val = user_data_gdf[value_col].min(), user_data_gdf[value_col].max()
-                        for _, row in user_data_gdf.iterrows():
-                            normalized_val = interp(row[value_col], [min_val, max_val], [0, 1]) if min_val != max_val else 0.5
-                            colorscale = [[0, 'rgba(255,255,255,0)'], [1, file_info['color']]]
-                            color = sample_colorscale(colorscale, normalized_val)[0]
-                            if isinstance(row.geometry, MultiPolygon):
-                                for poly in row.geometry.geoms: lons, lats = poly.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), fill="toself", fillcolor=color, line_color='rgba(0,0,0,0)', mode='lines', hoverinfo='none'))
-                            else: lons, lats = row.geometry.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), fill="toself", fillcolor=color, line_color='rgba(0,0,0,0)', mode='lines', hoverinfo='none'))
-                    else: 
-                        # *String data (icons)
-                        for idx, user_row in user_data_gdf.iterrows():
-                            centroid = user_row.geometry.centroid
-                            jitter_x = (random.random() - 0.5) * 0.01
-                            jitter_y = (random.random() - 0.5) * 0.01
-                            fig.add_trace(go.Scatter(
-                                x=[centroid.x + jitter_x], 
-                                y=[centroid.y + jitter_y],
-                                mode='text',
-                                text=file_info.get('icon', '📍'),
-                                textfont=dict(size=16, color=file_info['color']),
-                                hoverinfo='none'
-                            ))
-
-        def add_border_trace(geom, fig, line_color, line_width):
-            if isinstance(geom, MultiPolygon):
-                for poly in geom.geoms: lons, lats = poly.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), mode='lines', line_color=line_color, line_width=line_width, hoverinfo='none'))
-            else: lons, lats = geom.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), mode='lines', line_color=line_color, line_width=line_width, hoverinfo='none'))
-
-        if show_district_borders:
-            for _, row in districts_gdf.iterrows(): add_border_trace(row.geometry, fig, 'dimgray', 0.5)
-        if show_province_borders:
-            for _, row in provinces_gdf.iterrows(): add_border_trace(row.geometry, fig, 'black', 1.5)
-        for geom in nepal_border_gdf.geometry: add_border_trace(geom, fig, 'black', 3.5)
-
-        for _, row in districts_gdf.iterrows():
-            text_parts = []
-            district_name = row.get(district_col_name, 'N/A')
-            if show_district_tooltip: text_parts.append(f"<b>District:</b> {district_name}")
-            
-            for file_name, file_info in st.session_state.uploaded_files.items():
-                if file_info.get('tooltip_visible', False):
-                    user_df = file_info['data']
-                    value_col = file_info.get('value_column')
-                    
-                    items_in_district = user_df[user_df['Location'] == district_name]
-                    if not items_in_district.empty:
-                        label = file_info['tooltip_label']
-                        
-                        if len(items_in_district) > 1:
-                            text_parts.append(f"<b>{label}:</b>")
-                            for i, item_row in items_in_district.iterrows():
-                                item_value = item_row[value_col]
-                                text_parts.append(f"  {chr(97+i)}. {item_value}")
-                        else:
-                            item_value = items_in_district.iloc[0][value_col]
-                            try:
-                                numeric_val = float(item_value)
-                                text_parts.append(f"<b>{label}:</b> {numeric_val:,.2f}")
-                            except (ValueError, TypeError):
-                                text_parts.append(f"<b>{label}:</b> {item_value}")
+    if show_district_borders:
+        add_border_trace(district_coords, fig, 'dimgray', 0.5)
+    if show_province_borders:
+        add_border_trace(province_coords, fig, 'black', 1.5)
+    add_border_trace(coords_cache['nepal_border'], fig, 'black', 3.5)
+
+    # Build a Location -> values dict per tooltip layer once, instead of a
+    # full pandas scan per (district, layer) pair in the loop below.
+    layer_indices = {}
+    for file_name, file_info in _layers.items():
+        if file_info.get('tooltip_visible', False):
+            value_col = file_info['value_column']
+            # Key on the fuzzy-matched names when available so corrected rows
+            # still show up in their district's tooltip.
+            group_col = 'matched_location' if 'matched_location' in file_info['data'].columns else 'Location'
+            index_key = (file_name, value_col, int(pd.util.hash_pandas_object(file_info['data'][[group_col, value_col]]).sum()))
+            if index_key not in st.session_state.layer_indices:
+                st.session_state.layer_indices[index_key] = file_info['data'].groupby(group_col)[value_col].apply(list).to_dict()
+            layer_indices[file_name] = st.session_state.layer_indices[index_key]
 
+    for idx, row in districts_gdf.iterrows():
+        text_parts = []
+        district_name = row.get(district_col_name, 'N/A')
+        if show_district_tooltip: text_parts.append(f"<b>District:</b> {district_name}")
+
+        for file_name, file_info in _layers.items():
+            if file_info.get('tooltip_visible', False):
+                values_in_district = layer_indices[file_name].get(district_name)
+                if values_in_district:
+                    label = file_info['tooltip_label']
+
+                    if len(values_in_district) > 1:
+                        text_parts.append(f"<b>{label}:</b>")
+                        for i, item_value in enumerate(values_in_district):
+                            text_parts.append(f"  {chr(97+i)}. {item_value}")
+                    else:
+                        item_value = values_in_district[0]
+                        try:
+                            numeric_val = float(item_value)
+                            text_parts.append(f"<b>{label}:</b> {numeric_val:,.2f}")
+                        except (ValueError, TypeError):
+                            text_parts.append(f"<b>{label}:</b> {item_value}")
+
+        if text_parts:
+            # One invisible trace per district: plotly's fill hover only reads
+            # a scalar text, so these cannot be batched like the other layers.
             hover_text = "<br>".join(text_parts)
-            
-            if text_parts:
-                if isinstance(row.geometry, MultiPolygon):
-                    for poly in row.geometry.geoms: lons, lats = poly.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), fill="toself", fillcolor="rgba(0,0,0,0)", line_color="rgba(0,0,0,0)", mode='lines', hoverinfo='text', text=hover_text))
-                else: lons, lats = row.geometry.exterior.coords.xy; fig.add_trace(go.Scatter(x=list(lons), y=list(lats), fill="toself", fillcolor="rgba(0,0,0,0)", line_color="rgba(0,0,0,0)", mode='lines', hoverinfo='text', text=hover_text))
-
-        fig.update_layout(
-            margin={"r":0, "t":0, "l":0, "b":0}, showlegend=False,
-            yaxis=dict(scaleanchor="x", scaleratio=1), xaxis_visible=False, yaxis_visible=False,
-            plot_bgcolor='white', paper_bgcolor='white',
+            xs, ys = concat_polygons(district_coords[idx])
+            fig.add_trace(go.Scatter(x=xs, y=ys, fill="toself", fillcolor="rgba(0,0,0,0)", line_color="rgba(0,0,0,0)", mode='lines', hoverinfo='text', text=hover_text))
+
+    fig.update_layout(
+        margin={"r":0, "t":0, "l":0, "b":0}, showlegend=False,
+        yaxis=dict(scaleanchor="x", scaleratio=1), xaxis_visible=False, yaxis_visible=False,
+        plot_bgcolor='white', paper_bgcolor='white',
+        xaxis_range=map_extent[0], yaxis_range=map_extent[1],
+        # Constant uirevision tells the Plotly client to keep zoom/pan state
+        # across figure updates, with no relayout round-trip on our side.
+        uirevision='nepal_map',
+    )
+
+    return fig, empty_layers
+
+# *main function
+def main():
+    st.title("Map of Nepal 🇳🇵")
+
+    try:
+        geo = load_geo()
+
+        map_settings = (
+            show_district_borders, show_province_borders, color_by_province,
+            tuple(sorted(st.session_state.province_colors.items())),
+            tuple(sorted(st.session_state.province_visibility.items())),
+            show_district_tooltip,
+        )
+        layer_specs = tuple(
+            (file_name, file_info['visible'], file_info['color'], file_info.get('icon', '📍'),
+             file_info.get('tooltip_visible', False), file_info['tooltip_label'],
+             file_info['value_column'], int(pd.util.hash_pandas_object(file_info['data']).sum()))
+            for file_name, file_info in st.session_state.uploaded_files.items()
         )
+        fig, empty_layers = build_figure(geo, st.session_state.uploaded_files, map_settings, layer_specs)
+
+        for file_name in empty_layers:
+            st.warning(f"For '{st.session_state.uploaded_files[file_name]['display_name']}', no matching locations were found.")
 
-        if st.session_state.map_view and 'xaxis.range' in st.session_state.map_view:
-            fig.update_layout(xaxis_range=st.session_state.map_view['xaxis.range'], yaxis_range=st.session_state.map_view['yaxis.range'])
-        else:
-            lons, lats = nepal_border_gdf.geometry.union_all().exterior.coords.xy
-            fig.update_layout(xaxis_range=[min(lons), max(lons)], yaxis_range=[min(lats), max(lats)])
-        
-        st.plotly_chart(fig, use_container_width=True, key="nepal_map")
+        # theme=None skips Streamlit's per-trace theme rewrite of the figure.
+        st.plotly_chart(fig, use_container_width=True, theme=None, config={'displayModeBar': False}, key="nepal_map")
 
         # Add the footer below the map
         st.markdown("""
@@ -308,10 +444,6 @@ def main():
             Made by Prabesh Guragain and Ankit Bhattarai as a project of Data Mining.
         </div>
         """, unsafe_allow_html=True)
-        
-        event_data = st.session_state.get("nepal_map")
-        if isinstance(event_data, dict) and "relayoutData" in event_data:
-            if 'xaxis.range' in event_data['relayoutData']: st.session_state.map_view = event_data["relayoutData"]
 
     except FileNotFoundError as e:
         st.error(f"ERROR: GeoJSON file not found: `{e.filename}`. Please ensure your geojson files are in the correct `geo_data` folder.")